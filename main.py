@@ -1,6 +1,8 @@
 from __future__ import annotations
 from datetime import datetime, date
 from pathlib import Path
+import argparse
+import json
 import sys
 
 
@@ -35,10 +37,66 @@ def input_date(prompt: str) -> date:
     return date.fromisoformat(s)
 
 
+def afficher_pages(fetch, fmt) -> None:
+    """Affiche les pages renvoyées par `fetch(after)` ; Entrée pour la suivante."""
+    cursor = None
+    while True:
+        page, cursor = fetch(cursor)
+        for item in page:
+            print(fmt(item))
+        if cursor is None or input("-- Entrée : page suivante, q : arrêter -- ").strip().lower() == "q":
+            break
+
+
+def importer(ps: PatientService, cs: ConsultationService, path: Path) -> None:
+    """Rejoue un fichier JSON (`patients` puis `consultations`) dans un seul lot.
+
+    Chaque consultation est planifiée comme un nouveau rendez-vous : seuls
+    `patient_num`, `date_heure`, `medecin` et `motif` sont lus ; `id`,
+    `statut`, `diagnostic` et `prescriptions` sont ignorés (un nouvel `id` est
+    attribué). Le lot s'arrête au premier enregistrement invalide, les
+    précédents restant enregistrés.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f) or {}
+    with cs.batch():
+        for p in data.get("patients", []):
+            ps.ajouter_patient(
+                Patient(
+                    num_secu=p["numero_secu"],
+                    nom=p.get("nom", ""),
+                    prenom=p.get("prenom", ""),
+                    date_naissance=date.fromisoformat(p["date_naissance"]),
+                    adresse=p.get("adresse", ""),
+                    telephone=p.get("telephone", ""),
+                )
+            )
+        for c in data.get("consultations", []):
+            cs.planifier_consultation(
+                c["patient_num"], datetime.fromisoformat(c["date_heure"]), c.get("medecin", ""), c.get("motif", "")
+            )
+    print(f"Import terminé : {len(data.get('patients', []))} patient(s), {len(data.get('consultations', []))} consultation(s).")
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Cabinet médical")
+    parser.add_argument("--import", dest="import_file", type=Path, help="fichier JSON à importer en un seul lot")
+    args = parser.parse_args()
+
     ps = PatientService()
     cs = ConsultationService(patient_service=ps)
 
+    if args.import_file:
+        try:
+            importer(ps, cs, args.import_file)
+        except (PatientNotFoundError, ConsultationNotFoundError) as e:
+            print("Erreur:", e)
+        except InvalidSecurityNumberError as e:
+            print("Numéro de sécurité invalide:", e)
+        except Exception as e:
+            print("Erreur inattendue:", type(e).__name__, e)
+        return
+
     while True:
         print("\n--- Cabinet médical ---")
         print("1) Ajouter patient")
@@ -49,6 +107,7 @@ def main() -> None:
         print("6) Annuler consultation")
         print("7) Ajouter diagnostic")
         print("8) Ajouter prescription (textuelle)")
+        print("9) Patients à partir d'un âge")
         print("0) Quitter")
         choice = input("> ").strip()
 
@@ -65,8 +124,10 @@ def main() -> None:
                 print("Patient ajouté.")
 
             elif choice == "2":
-                for p in ps.lister_patients():
-                    print(f"- {p.numero_secu} : {p.nom} {p.prenom} ({p.date_naissance.isoformat()})")
+                afficher_pages(
+                    lambda after: ps.lister_patients(after=after),
+                    lambda p: f"- {p.numero_secu} : {p.nom} {p.prenom} ({p.date_naissance.isoformat()})",
+                )
 
             elif choice == "3":
                 num = input("Numéro de sécu du patient: ").strip()
@@ -75,11 +136,13 @@ def main() -> None:
                 med = input("Médecin: ").strip()
                 motif = input("Motif: ").strip()
                 c = cs.planifier_consultation(num, date_heure, med, motif)
-                print(f"Consultation planifiée id={c['id']}")
+                print(f"Consultation planifiée id={c.id}")
 
             elif choice == "4":
-                for c in cs.lister_consultations_a_venir():
-                    print(f"- {c['id']} | {c['patient_num']} | {c['date_heure']} | {c['medecin']} | {c['motif']}")
+                afficher_pages(
+                    lambda after: cs.lister_consultations_a_venir(after=after),
+                    lambda c: f"- {c.id} | {c.patient_num} | {c.date_heure_iso} | {c.medecin} | {c.motif}",
+                )
 
             elif choice == "5":
                 cid = input("ID consultation: ").strip()
@@ -111,6 +174,11 @@ def main() -> None:
                     cs.ajouter_prescription(cid, type("P", (), {"description": desc}))
                 print("Prescription ajoutée.")
 
+            elif choice == "9":
+                age_min = int(input("Âge minimum: ").strip())
+                for p in ps.patients_age_minimum(age_min):
+                    print(f"- {p.numero_secu} : {p.nom} {p.prenom} ({p.calculer_age()} ans)")
+
             elif choice == "0":
                 print("Au revoir")
                 break
@@ -7,10 +7,12 @@ Contrainte importantes (implémenter dans la suite) :
 - Le diagnostic ne peut être ajouté que si la consultation est réalisée.
 """
 from __future__ import annotations
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional
 
 
+@dataclass(slots=True, eq=False, repr=False)
 class Consultation:
 	"""
 	Représente une consultation (rendez-vous).
@@ -36,20 +38,13 @@ class Consultation:
 	STATUS_REALISEE = "réalisée"
 	STATUS_ANNULEE = "annulée"
 
-	def __init__(
-		self,
-		date_heure: datetime,
-		patient: object,
-		medecin: str,
-		motif: str,
-	) -> None:
-		self.date_heure = date_heure
-		self.patient = patient
-		self.medecin = medecin
-		self.motif = motif
-		self.diagnostic: Optional[str] = None
-		self.prescriptions: List[object] = []  # type: ignore[assignment]
-		self.statut: str = Consultation.STATUS_PLANIFIEE
+	date_heure: datetime
+	patient: object
+	medecin: str
+	motif: str
+	diagnostic: Optional[str] = field(default=None, init=False)
+	prescriptions: List[object] = field(default_factory=list, init=False)
+	statut: str = field(default=STATUS_PLANIFIEE, init=False)
 
 	def peut_modifier(self) -> bool:
 		"""Retourne True si la consultation peut être modifiée selon son statut."""
@@ -3,104 +3,73 @@ Module models.patient
 Contient la classe `Patient` et les méthodes de base.
 
 Remarques sur la conception :
-- Les attributs sensibles sont protégés par convention (préfixe `_`).
+- `Patient` est une dataclass à slots : attributs stockés directement, sans `__dict__`.
 - La validation du numéro de sécurité sociale (15 chiffres) se fera via `utils.validators`
 - La méthode `calculer_age` calcule l'âge à partir de la date de naissance.
 """
 from __future__ import annotations
-from datetime import date, datetime
-from typing import List
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Tuple
 
 
+@dataclass(slots=True, eq=False, repr=False)
 class Patient:
 	"""
 	Représente un patient du cabinet.
 
-	Attributs principaux (encapsulés) :
-	- _num_secu : str -> numéro de sécurité sociale (15 chiffres)
-	- _nom : str
-	- _prenom : str
-	- _date_naissance : date
-	- _adresse : str
-	- _telephone : str
-	- _consultations : List -> liste d'objets `Consultation`
+	Attributs principaux :
+	- num_secu : str -> numéro de sécurité sociale (15 chiffres), aussi exposé en `numero_secu`
+	- nom : str
+	- prenom : str
+	- date_naissance : date
+	- adresse : str
+	- telephone : str
+	- consultations : List -> liste des consultations du patient
 
 	Nota : la validation détaillée (format du numéro, etc.) est déléguée
 	aux utilitaires de validation (module `utils.validators`).
 	"""
 
-	def __init__(
-		self,
-		num_secu: str,
-		nom: str,
-		prenom: str,
-		date_naissance: date,
-		adresse: str = "",
-		telephone: str = "",
-	) -> None:
-		# attributs protégés
-		self._num_secu = num_secu
-		self._nom = nom
-		self._prenom = prenom
-		self._date_naissance = date_naissance
-		self._adresse = adresse
-		self._telephone = telephone
-		self._consultations: List[object] = []  # type: ignore[assignment]
+	num_secu: str
+	nom: str
+	prenom: str
+	date_naissance: date
+	adresse: str = ""
+	telephone: str = ""
+	consultations: List[object] = field(default_factory=list)
+	# (ordinal du jour, date de naissance, âge) du dernier calcul pour aujourd'hui
+	_age_cache: Optional[Tuple[int, date, int]] = field(default=None, init=False)
 
-	# Propriétés pour l'accès contrôlé aux attributs
 	@property
 	def numero_secu(self) -> str:
-		return self._num_secu
-
-	@property
-	def nom(self) -> str:
-		return self._nom
-
-	@property
-	def prenom(self) -> str:
-		return self._prenom
-
-	@property
-	def date_naissance(self) -> date:
-		return self._date_naissance
-
-	@property
-	def adresse(self) -> str:
-		return self._adresse
-
-	@adresse.setter
-	def adresse(self, value: str) -> None:
-		self._adresse = value
-
-	@property
-	def telephone(self) -> str:
-		return self._telephone
-
-	@telephone.setter
-	def telephone(self, value: str) -> None:
-		self._telephone = value
-
-	@property
-	def consultations(self) -> List[object]:
-		"""Retourne la liste des consultations (lecture seule)."""
-		return list(self._consultations)
+		return self.num_secu
 
 	def ajouter_consultation(self, consultation: object) -> None:
 		"""Ajoute une consultation au dossier du patient.
 
 		La logique (par ex. vérifier doublons) peut être ajoutée ici.
 		"""
-		self._consultations.append(consultation)
+		self.consultations.append(consultation)
 
 	def calculer_age(self, au_jour: date | None = None) -> int:
 		"""Calcule l'âge du patient à la date fournie (ou aujourd'hui).
 
-		Retourne un entier représentant les années complètes.
+		Retourne un entier représentant les années complètes. Sans `au_jour`,
+		le résultat est mémorisé pour la journée en cours.
 		"""
 		today = au_jour or date.today()
-		born = self._date_naissance
+		born = self.date_naissance
+		if au_jour is None:
+			ordinal = today.toordinal()
+			cache = self._age_cache
+			# date_naissance est modifiable : elle fait partie de la clé
+			if cache is not None and cache[0] == ordinal and cache[1] == born:
+				return cache[2]
 		age = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+		if au_jour is None:
+			self._age_cache = (ordinal, born, age)
 		return age
 
 	def __repr__(self) -> str:
-		return f"Patient({self._num_secu}, {self._nom} {self._prenom})"
+		return f"Patient({self.num_secu}, {self.nom} {self.prenom})"
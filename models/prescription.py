@@ -20,12 +20,16 @@ class Prescription(ABC):
 	- duree (str)
 
 	Méthode abstraite : afficher_details()
+
+	`_dict` contient la forme sérialisée, construite une fois à l'initialisation
+	(les attributs ne sont pas censés changer ensuite).
 	"""
 
 	def __init__(self, description: str, posologie: str, duree: str) -> None:
 		self.description = description
 		self.posologie = posologie
 		self.duree = duree
+		self._dict = {"_type": type(self).__name__, "description": description, "posologie": posologie, "duree": duree}
 
 	@abstractmethod
 	def afficher_details(self) -> str:
@@ -39,6 +43,7 @@ class PrescriptionMedicamenteuse(Prescription):
 	def __init__(self, medicament: str, dosage: str, frequence: str, duree: str) -> None:
 		super().__init__(description=medicament, posologie=dosage, duree=duree)
 		self.frequence = frequence
+		self._dict["frequence"] = frequence
 
 	def afficher_details(self) -> str:
 		return f"Médicament: {self.description}, dosage: {self.posologie}, fréquence: {self.frequence}, durée: {self.duree}"
@@ -50,6 +55,7 @@ class PrescriptionExamen(Prescription):
 	def __init__(self, type_examen: str, laboratoire: Optional[str] = None) -> None:
 		super().__init__(description=type_examen, posologie="n/a", duree="n/a")
 		self.laboratoire = laboratoire
+		self._dict["laboratoire"] = laboratoire
 
 	def afficher_details(self) -> str:
 		lab = f", laboratoire: {self.laboratoire}" if self.laboratoire else ""
@@ -63,6 +69,7 @@ class PrescriptionKinesitherapie(Prescription):
 		super().__init__(description="kinésithérapie", posologie=f"{nb_seances} séances", duree="par séances")
 		self.nb_seances = nb_seances
 		self.zone = zone
+		self._dict.update(nb_seances=nb_seances, zone=zone)
 
 	def afficher_details(self) -> str:
 		return f"Kinésithérapie: {self.nb_seances} séances, zone: {self.zone}"
@@ -1,6 +1,7 @@
 from .patient_service import PatientService, PatientNotFoundError, InvalidSecurityNumberError
 from .consultation_service import (
 	ConsultationService,
+	ConsultationRow,
 	ConsultationNotFoundError,
 	InvalidConsultationStatusError,
 )
@@ -10,6 +11,7 @@ __all__ = [
 	"PatientNotFoundError",
 	"InvalidSecurityNumberError",
 	"ConsultationService",
+	"ConsultationRow",
 	"ConsultationNotFoundError",
 	"InvalidConsultationStatusError",
 ]
@@ -6,14 +6,20 @@ Fournit :
   ajouter diagnostics et prescriptions.
 
 Ce module travaille avec `PatientService` et sérialise les consultations
-dans `data/cabinet_data.json` (même structure que PatientService).
+dans `data/cabinet_data.json` (même structure que PatientService) ; chaque
+mutation est ajoutée au journal de `PatientService` plutôt que de réécrire le fichier.
 """
 from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import atexit
 from pathlib import Path
-import uuid
+import secrets
+import sys
 
 from medical_cabinet.models import Consultation, Prescription
 from medical_cabinet.services.patient_service import PatientService, PatientNotFoundError
@@ -23,6 +29,25 @@ DATA_FILE = BASE_DIR / "data" / "cabinet_data.json"
 LOG_FILE = BASE_DIR / "logs.txt"
 
 
+# Statuts lus une fois sur le modèle `Consultation` puis internés : les
+# consultations chargées ou créées par le service partagent ces mêmes objets,
+# ce qui permet de les comparer par identité (`is`).
+_STATUS_PLANIFIEE = sys.intern(getattr(Consultation, "STATUS_PLANIFIEE", "planifiée"))
+_STATUS_REALISEE = sys.intern(getattr(Consultation, "STATUS_REALISEE", "réalisée"))
+_STATUS_ANNULEE = sys.intern(getattr(Consultation, "STATUS_ANNULEE", "annulée"))
+
+
+def _intern_statut(statut: str) -> str:
+	# orthographe sans accent acceptée dans d'anciens fichiers
+	return _STATUS_PLANIFIEE if statut == "planifiee" else sys.intern(statut)
+
+
+def _naive_local(dt: datetime) -> datetime:
+	# l'index trie des datetimes, qui ne se comparent pas entre naïfs et avec
+	# fuseau : une date avec fuseau est ramenée à l'heure locale naïve
+	return dt if dt.tzinfo is None else dt.astimezone().replace(tzinfo=None)
+
+
 class ConsultationNotFoundError(Exception):
 	pass
 
@@ -34,16 +59,19 @@ class InvalidConsultationStatusError(Exception):
 try:
 	from medical_cabinet.utils.decorators import log_action as _imported_log_action  # type: ignore
 except Exception:
+	# fichier de log ouvert une seule fois (ajout, tampon ligne)
+	try:
+		_LOG_FH = open(LOG_FILE, "a", encoding="utf-8", buffering=1)
+	except OSError:
+		_LOG_FH = None
+	else:
+		atexit.register(_LOG_FH.close)
+
 	def log_action(func):
 		def wrapper(*args, **kwargs):
 			res = func(*args, **kwargs)
-			try:
-				with open(LOG_FILE, "a", encoding="utf-8") as f:
-					from datetime import datetime
-
-					f.write(f"[{datetime.now().isoformat()}] Action effectuée: {func.__name__}\n")
-			except Exception:
-				pass
+			if _LOG_FH is not None:
+				_LOG_FH.write(f"[{datetime.now().isoformat()}] Action effectuée: {func.__name__}\n")
 			return res
 
 		return wrapper
@@ -58,40 +86,141 @@ else:
 				except Exception:
 					return fn
 
+		# used as @log_action without args: the function name is the description
 		if len(d_args) == 1 and callable(d_args[0]) and not d_kwargs:
-			return _decorator(d_args[0])
+			fn = d_args[0]
+			return _imported_log_action(fn.__name__)(fn)
 		return _decorator
 
 
+@dataclass(slots=True)
+class ConsultationRow:
+	"""Consultation telle que stockée par `ConsultationService`.
+
+	`date_heure` est parsée une seule fois (chargement ou planification) ;
+	`date_heure_iso` conserve la chaîne d'origine, réécrite telle quelle.
+	`statut` est interné à la construction : les gardes du service le
+	comparent par identité. `date_heure` est ramenée à l'heure locale naïve
+	(voir `_naive_local`) ; `date_heure_iso` garde le fuseau d'origine.
+	"""
+
+	id: str
+	patient_num: str
+	date_heure: datetime
+	date_heure_iso: str
+	medecin: str
+	motif: str
+	diagnostic: Optional[str] = None
+	statut: str = _STATUS_PLANIFIEE
+	prescriptions: List[Dict[str, Any]] = field(default_factory=list)
+
+	def __post_init__(self) -> None:
+		self.statut = _intern_statut(self.statut)
+		self.date_heure = _naive_local(self.date_heure)
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> ConsultationRow:
+		return cls(
+			id=data["id"],
+			patient_num=data.get("patient_num", ""),
+			date_heure=datetime.fromisoformat(data["date_heure"]),
+			date_heure_iso=data["date_heure"],
+			medecin=data.get("medecin", ""),
+			motif=data.get("motif", ""),
+			diagnostic=data.get("diagnostic"),
+			statut=data.get("statut", _STATUS_PLANIFIEE),
+			prescriptions=data.get("prescriptions") or [],
+		)
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"id": self.id,
+			"patient_num": self.patient_num,
+			"date_heure": self.date_heure_iso,
+			"medecin": self.medecin,
+			"motif": self.motif,
+			"diagnostic": self.diagnostic,
+			"prescriptions": self.prescriptions,
+			"statut": self.statut,
+		}
+
+
 class ConsultationService:
 	"""Service gérant les consultations.
 
-	- stocke en mémoire `consultations` : liste de dicts sérialisés contenant un `id` unique
+	- expose `consultations` : liste de `ConsultationRow` contenant un `id` unique,
+	  chargée au premier accès (`_ensure_loaded`, appelé aussi par `consultations`)
 	- fournit des méthodes pour manipuler ces consultations et sauvegarder l'état
 	"""
 
 	def __init__(self, patient_service: Optional[PatientService] = None) -> None:
 		self.patient_service = patient_service or PatientService()
-		self.consultations: List[Dict[str, Any]] = []
-		self._load()
+		self.patient_service._consultation_service = self
+		self._consultations: List[ConsultationRow] = []
+		# index id -> consultation (mêmes objets que `consultations`)
+		self._by_id: Dict[str, ConsultationRow] = {}
+		# consultations planifiées triées par (date_heure, id)
+		self._planned_sorted: List[Tuple[datetime, str]] = []
+		# index numéro de sécu -> consultations du patient (tous statuts)
+		self._by_patient: Dict[str, List[ConsultationRow]] = defaultdict(list)
+		self._loaded = False
+
+	@property
+	def consultations(self) -> List[ConsultationRow]:
+		"""Consultations dans l'ordre de création, chargées au premier accès."""
+		self._ensure_loaded()
+		return self._consultations
+
+	def _ensure_loaded(self) -> None:
+		# comme `PatientService._ensure_loaded` : un chargement en échec est retenté
+		if not self._loaded:
+			self._load()
+			self._loaded = True
 
 	def _load(self) -> None:
-		if not DATA_FILE.exists():
-			return
-		try:
-			with open(DATA_FILE, "r", encoding="utf-8") as f:
-				data = json.load(f) or {}
-		except Exception:
-			data = {}
-		self.consultations = data.get("consultations", [])
+		# chaque enregistrement est converti (et sa date parsée) dès sa lecture,
+		# sans garder la liste JSON complète en mémoire
+		rows: Dict[str, ConsultationRow] = {}
+		for c in self.patient_service._iter_snapshot("consultations"):
+			rows[c["id"]] = ConsultationRow.from_dict(c)
+
+		# rejouer le journal : la dernière version d'une consultation l'emporte
+		for entry in self.patient_service._read_journal():
+			if entry.get("type") == "consultation":
+				rows[entry["data"]["id"]] = ConsultationRow.from_dict(entry["data"])
 
-	def _save(self) -> None:
-		# demander au patient_service d'écrire patients et nous fournir les consultations sérialisées
-		consultations_serialized = self.consultations
-		self.patient_service._save(consultations_serialized=consultations_serialized)
+		self._consultations = list(rows.values())
+		self._by_id = rows
+		self._by_patient = defaultdict(list)
+		for c in self._consultations:
+			self._by_patient[c.patient_num].append(c)
+		self._planned_sorted = sorted(
+			(c.date_heure, c.id) for c in self._consultations if c.statut is _STATUS_PLANIFIEE
+		)
+
+	def _unindex_planned(self, c: ConsultationRow) -> None:
+		key = (c.date_heure, c.id)
+		i = bisect_left(self._planned_sorted, key)
+		if i < len(self._planned_sorted) and self._planned_sorted[i] == key:
+			del self._planned_sorted[i]
+
+	def _journal(self, c: ConsultationRow) -> None:
+		# une seule ligne ajoutée au journal ; la compaction éventuelle relit
+		# nos consultations via `patient_service._consultation_service`
+		self.patient_service._journal("consultation", c.to_dict())
+
+	@contextmanager
+	def batch(self) -> Iterator[ConsultationService]:
+		"""Regroupe les mutations du bloc `with` (voir `PatientService.batch`)."""
+		with self.patient_service.batch():
+			yield self
 
 	def _serialize_prescription(self, presc: Prescription) -> Dict[str, Any]:
-		# très simple : enregistrer la classe et ses attributs publics
+		# les `Prescription` portent déjà leur forme sérialisée
+		serialized = getattr(presc, "_dict", None)
+		if serialized is not None:
+			return serialized
+		# autre objet : enregistrer la classe et ses attributs publics
 		return {"_type": presc.__class__.__name__, "description": getattr(presc, "description", ""), "posologie": getattr(presc, "posologie", ""), "duree": getattr(presc, "duree", "")}
 
 	def _deserialize_prescription(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -99,72 +228,94 @@ class ConsultationService:
 		return data
 
 	@log_action
-	def planifier_consultation(self, patient_num: str, date_heure: datetime, medecin: str, motif: str) -> Dict[str, Any]:
+	def planifier_consultation(self, patient_num: str, date_heure: datetime, medecin: str, motif: str) -> ConsultationRow:
+		self._ensure_loaded()
 		# vérifier patient
 		try:
 			patient = self.patient_service.rechercher_patient(patient_num)
 		except PatientNotFoundError:
 			raise
 
-		cid = str(uuid.uuid4())
-		c = {
-			"id": cid,
-			"patient_num": patient_num,
-			"date_heure": date_heure.isoformat(),
-			"medecin": medecin,
-			"motif": motif,
-			"diagnostic": None,
-			"prescriptions": [],
-			"statut": Consultation.STATUS_PLANIFIEE if hasattr(Consultation, "STATUS_PLANIFIEE") else "planifiée",
-		}
-		self.consultations.append(c)
+		cid = secrets.token_hex(16)
+		c = ConsultationRow(
+			id=cid,
+			patient_num=patient_num,
+			date_heure=date_heure,
+			date_heure_iso=date_heure.isoformat(),
+			medecin=medecin,
+			motif=motif,
+			statut=_STATUS_PLANIFIEE,
+		)
+		# l'index d'abord : s'il échoue, aucun autre conteneur n'a été modifié
+		insort(self._planned_sorted, (c.date_heure, cid))
+		self._consultations.append(c)
+		self._by_id[cid] = c
+		self._by_patient[patient_num].append(c)
 		# ajouter à l'objet patient en mémoire si possible
 		try:
 			patient.ajouter_consultation(c)
 		except Exception:
 			pass
-		self._save()
+		self._journal(c)
 		return c
 
-	def lister_consultations_a_venir(self) -> List[Dict[str, Any]]:
-		now = datetime.now()
-		upcoming = [c for c in self.consultations if c.get("statut") in ("planifiée", "planifiee") and datetime.fromisoformat(c["date_heure"]) >= now]
-		return sorted(upcoming, key=lambda x: x["date_heure"])
+	def lister_consultations_a_venir(self, after: Optional[str] = None, limit: int = 50) -> Tuple[List[ConsultationRow], Optional[str]]:
+		"""Retourne une page des consultations planifiées à venir, par date.
 
-	def _find_by_id(self, consultation_id: str) -> Dict[str, Any]:
-		for c in self.consultations:
-			if c.get("id") == consultation_id:
-				return c
-		raise ConsultationNotFoundError(f"Consultation {consultation_id} introuvable")
+		`after` est le curseur (id de consultation) renvoyé par l'appel précédent.
+		Retourne `(page, curseur_suivant)`, le curseur valant None en fin de liste.
+		"""
+		self._ensure_loaded()
+		start = bisect_left(self._planned_sorted, (datetime.now(), ""))
+		if after is not None:
+			c = self._find_by_id(after)
+			start = max(start, bisect_right(self._planned_sorted, (c.date_heure, after)))
+		page = self._planned_sorted[start:start + limit]
+		cursor = page[-1][1] if page and start + limit < len(self._planned_sorted) else None
+		return [self._by_id[cid] for _, cid in page], cursor
+
+	def historique(self, patient_num: str) -> List[ConsultationRow]:
+		"""Retourne les consultations (tous statuts) du patient, dans l'ordre de création."""
+		self._ensure_loaded()
+		return list(self._by_patient.get(patient_num, ()))
+
+	def _find_by_id(self, consultation_id: str) -> ConsultationRow:
+		self._ensure_loaded()
+		try:
+			return self._by_id[consultation_id]
+		except KeyError:
+			raise ConsultationNotFoundError(f"Consultation {consultation_id} introuvable") from None
 
 	@log_action
 	def marquer_realisee(self, consultation_id: str) -> None:
 		c = self._find_by_id(consultation_id)
-		if c.get("statut") == Consultation.STATUS_ANNULEE if hasattr(Consultation, "STATUS_ANNULEE") else "annulée":
+		if c.statut is _STATUS_ANNULEE:
 			raise InvalidConsultationStatusError("Impossible de réaliser une consultation annulée")
-		c["statut"] = Consultation.STATUS_REALISEE if hasattr(Consultation, "STATUS_REALISEE") else "réalisée"
-		self._save()
+		self._unindex_planned(c)
+		c.statut = _STATUS_REALISEE
+		self._journal(c)
 
 	@log_action
 	def annuler_consultation(self, consultation_id: str) -> None:
 		c = self._find_by_id(consultation_id)
-		if c.get("statut") == (Consultation.STATUS_REALISEE if hasattr(Consultation, "STATUS_REALISEE") else "réalisée"):
+		if c.statut is _STATUS_REALISEE:
 			raise InvalidConsultationStatusError("Impossible d'annuler une consultation déjà réalisée")
-		c["statut"] = Consultation.STATUS_ANNULEE if hasattr(Consultation, "STATUS_ANNULEE") else "annulée"
-		self._save()
+		self._unindex_planned(c)
+		c.statut = _STATUS_ANNULEE
+		self._journal(c)
 
 	@log_action
 	def ajouter_diagnostic(self, consultation_id: str, diagnostic: str) -> None:
 		c = self._find_by_id(consultation_id)
-		if c.get("statut") != (Consultation.STATUS_REALISEE if hasattr(Consultation, "STATUS_REALISEE") else "réalisée"):
+		if c.statut is not _STATUS_REALISEE:
 			raise InvalidConsultationStatusError("Le diagnostic ne peut être ajouté que si la consultation est réalisée")
-		c["diagnostic"] = diagnostic
-		self._save()
+		c.diagnostic = diagnostic
+		self._journal(c)
 
 	@log_action
 	def ajouter_prescription(self, consultation_id: str, prescription: Prescription) -> None:
 		c = self._find_by_id(consultation_id)
 		c_presc = self._serialize_prescription(prescription)
-		c["prescriptions"].append(c_presc)
-		self._save()
+		c.prescriptions.append(c_presc)
+		self._journal(c)
 
@@ -3,6 +3,7 @@ Services pour la gestion des patients.
 
 Ce module fournit :
 - `PatientService` : CRUD minimal sur les patients + persistance JSON
+  (instantané `cabinet_data.json` + journal en ajout seul `cabinet_data.journal`)
 - Exceptions personnalisées utilisées par les services
 
 Remarque : Le module tente d'utiliser les décorateurs de `utils.decorators`.
@@ -10,27 +11,81 @@ S'ils sont absents, des décorateurs no-op ou équivalents sont définis localem
 pour assurer le fonctionnement sans modifier le dossier `utils`.
 """
 from __future__ import annotations
+from bisect import bisect_right
+from contextlib import contextmanager
+import atexit
 import json
+import os
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from datetime import date, datetime
 import uuid
 
 from medical_cabinet.models import Patient
 
+if TYPE_CHECKING:
+	from medical_cabinet.services.consultation_service import ConsultationRow, ConsultationService
+
 # Chemin des données
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_FILE = BASE_DIR / "data" / "cabinet_data.json"
+JOURNAL_FILE = BASE_DIR / "data" / "cabinet_data.journal"
 LOG_FILE = BASE_DIR / "logs.txt"
 
+# Nombre d'entrées du journal au-delà duquel l'instantané JSON est réécrit (compaction)
+JOURNAL_COMPACTION_THRESHOLD = 200
+
+# Calculs d'âge vectorisés : NumPy si installé, sinon boucle Python
+try:
+	import numpy as np  # type: ignore
+except ImportError:
+	np = None
+
+# Sérialisation JSON : orjson (extension C) si installé, sinon module standard `json`
+try:
+	import orjson  # type: ignore
+except ImportError:
+	orjson = None
+
+
+def _json_dumps(obj: object, indent: bool = False) -> bytes:
+	if orjson is not None:
+		return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+	return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> object:
+	if orjson is not None:
+		return orjson.loads(data)
+	return json.loads(data)
+
+
+# Lecture en flux de l'instantané : ijson si installé, pour les fichiers d'au moins
+# `STREAMING_LOAD_THRESHOLD` octets ; en dessous, un parsing complet est plus rapide.
+try:
+	import ijson  # type: ignore
+except ImportError:
+	ijson = None
+
+STREAMING_LOAD_THRESHOLD = 1 << 20
+
 
 # Exceptions personnalisées
 class PatientNotFoundError(Exception):
 	pass
 
 
-class InvalidSecurityNumberError(Exception):
-	pass
+# La validation du numéro de sécu est déléguée à `utils.validators` (qui fournit
+# aussi l'exception) ; sinon fallback local équivalent.
+try:
+	from medical_cabinet.utils.validators import InvalidSecurityNumberError, validate_security_number  # type: ignore
+except Exception:
+	class InvalidSecurityNumberError(Exception):
+		pass
+
+	def validate_security_number(security_number: str) -> None:
+		if not isinstance(security_number, str) or len(security_number) != 15 or not security_number.isdigit():
+			raise InvalidSecurityNumberError("Le numéro de sécurité sociale doit contenir 15 chiffres")
 
 
 # Tentative d'import des décorateurs depuis utils; sinon fallback.
@@ -39,17 +94,20 @@ class InvalidSecurityNumberError(Exception):
 try:
 	from medical_cabinet.utils.decorators import log_action as _imported_log_action, validate_patient  # type: ignore
 except Exception:
+	# fichier de log ouvert une seule fois (ajout, tampon ligne)
+	try:
+		_LOG_FH = open(LOG_FILE, "a", encoding="utf-8", buffering=1)
+	except OSError:
+		_LOG_FH = None
+	else:
+		atexit.register(_LOG_FH.close)
+
 	def log_action(func):
 		def wrapper(*args, **kwargs):
-			try:
-				res = func(*args, **kwargs)
-				with open(LOG_FILE, "a", encoding="utf-8") as f:
-					from datetime import datetime
-
-					f.write(f"[{datetime.now().isoformat()}] Action effectuée: {func.__name__}\n")
-				return res
-			except Exception:
-				raise
+			res = func(*args, **kwargs)
+			if _LOG_FH is not None:
+				_LOG_FH.write(f"[{datetime.now().isoformat()}] Action effectuée: {func.__name__}\n")
+			return res
 
 		return wrapper
 	def validate_patient(func):
@@ -68,80 +126,235 @@ else:
 				except Exception:
 					return fn
 
-		# used as @log_action without args
+		# used as @log_action without args: the function name is the description
 		if len(d_args) == 1 and callable(d_args[0]) and not d_kwargs:
-			return _decorator(d_args[0])
+			fn = d_args[0]
+			return _imported_log_action(fn.__name__)(fn)
 		return _decorator
 
 
+def _fsync_dir(path: Path) -> None:
+	"""Rend durable un renommage dans `path` (sans effet là où c'est impossible, ex. Windows)."""
+	try:
+		fd = os.open(path, os.O_RDONLY)
+	except OSError:
+		return
+	try:
+		os.fsync(fd)
+	except OSError:
+		pass
+	finally:
+		os.close(fd)
+
+
 class PatientService:
 	"""Service pour gérer les patients et la persistance.
 
-	- stocke en mémoire un dict `patients` indexé par numéro de sécurité
-	- lit/écrit `DATA_FILE` au format JSON
+	- expose un dict `patients` indexé par numéro de sécurité
+	- lit `DATA_FILE` (instantané JSON) puis rejoue `JOURNAL_FILE` au premier
+	  accès à l'état existant (`_ensure_loaded`, appelé aussi par `patients`)
+	- chaque mutation ajoute une seule ligne au journal ; l'instantané n'est
+	  réécrit (compaction) que lorsque le journal dépasse `JOURNAL_COMPACTION_THRESHOLD`
 	"""
 
 	def __init__(self) -> None:
-		self.patients: Dict[str, Patient] = {}
-		self._load()
+		self._patients: Dict[str, Patient] = {}
+		self._journal_len = 0
+		# empreinte du dernier instantané lu/écrit : évite de réécrire un contenu identique
+		self._last_hash: Optional[int] = None
+		# mode lot : entrées du journal en attente d'écriture
+		self._batch_depth = 0
+		self._pending: List[bytes] = []
+		# renseigné par `ConsultationService.__init__` : consultations tenues en mémoire
+		self._consultation_service: Optional[ConsultationService] = None
+		# numéros de sécu triés pour la pagination ; invalidé à chaque nouveau patient
+		self._sorted_secu: Optional[List[str]] = None
+		# (dates, années, mois*100+jour) de naissance alignés sur `_sorted_secu` ;
+		# invalidé à chaque ajout, reconstruit si une date de naissance a changé
+		self._dob_arrays = None
+		self._loaded = False
+
+	@property
+	def patients(self) -> Dict[str, Patient]:
+		"""Patients indexés par numéro de sécurité, chargés au premier accès."""
+		self._ensure_loaded()
+		return self._patients
+
+	def _ensure_loaded(self) -> None:
+		# marqué chargé seulement après un chargement complet : un échec est
+		# remonté à chaque appel (et retenté) au lieu de laisser un état partiel
+		if not self._loaded:
+			self._load()
+			self._loaded = True
 
 	def _load(self) -> None:
+		# repartir de zéro : une tentative précédente a pu s'interrompre en cours de route
+		self._patients.clear()
+		self._sorted_secu = None
+		self._dob_arrays = None
 		if not DATA_FILE.exists():
 			self._dump_empty()
-			return
+		for p in self._iter_snapshot("patients"):
+			self._load_patient(p)
+
+		entries = self._read_journal()
+		self._journal_len = len(entries)
+		for entry in entries:
+			if entry.get("type") == "patient":
+				self._load_patient(entry["data"])
+
+	def _iter_snapshot(self, key: str) -> Iterator[dict]:
+		"""Itère sur les enregistrements de la liste `key` de `DATA_FILE`.
+
+		Un gros fichier est parcouru avec ijson sans construire l'arbre JSON
+		complet ; sinon il est lu d'un bloc (et son empreinte mémorisée).
+		Un fichier illisible s'arrête là, comme un fichier vide.
+		"""
 		try:
-			with open(DATA_FILE, "r", encoding="utf-8") as f:
-				data = json.load(f) or {}
+			if ijson is not None and DATA_FILE.stat().st_size >= STREAMING_LOAD_THRESHOLD:
+				with open(DATA_FILE, "rb") as f:
+					yield from ijson.items(f, f"{key}.item", use_float=True)
+				return
+			with open(DATA_FILE, "rb") as f:
+				raw = f.read()
+			self._last_hash = hash(raw)
+			data = _json_loads(raw) or {}
 		except Exception:
-			data = {}
-
-		patients = data.get("patients", [])
-		for p in patients:
-			# reconstruction minimale : date_naissance attendu en ISO YYYY-MM-DD
-			dob = date.fromisoformat(p["date_naissance"]) if p.get("date_naissance") else date.today()
-			patient = Patient(
-				num_secu=p["numero_secu"],
-				nom=p.get("nom", ""),
-				prenom=p.get("prenom", ""),
-				date_naissance=dob,
-				adresse=p.get("adresse", ""),
-				telephone=p.get("telephone", ""),
-			)
-			self.patients[patient.numero_secu] = patient
+			return
+		yield from data.get(key, [])
+
+	def _load_patient(self, p: dict) -> None:
+		# reconstruction minimale : date_naissance attendu en ISO YYYY-MM-DD
+		dob = date.fromisoformat(p["date_naissance"]) if p.get("date_naissance") else date.today()
+		patient = Patient(
+			num_secu=p["numero_secu"],
+			nom=p.get("nom", ""),
+			prenom=p.get("prenom", ""),
+			date_naissance=dob,
+			adresse=p.get("adresse", ""),
+			telephone=p.get("telephone", ""),
+		)
+		self._patients[patient.numero_secu] = patient
+
+	def _serialize_patient(self, p: Patient) -> dict:
+		return {
+			"numero_secu": p.numero_secu,
+			"nom": p.nom,
+			"prenom": p.prenom,
+			"date_naissance": p.date_naissance.isoformat(),
+			"adresse": p.adresse,
+			"telephone": p.telephone,
+		}
+
+	def _read_journal(self) -> List[dict]:
+		"""Retourne les entrées du journal dans l'ordre d'écriture.
+
+		Une ligne tronquée (arrêt brutal pendant l'écriture) est ignorée ;
+		`_flush_journal` la termine avant d'ajouter de nouvelles entrées.
+		"""
+		if not JOURNAL_FILE.exists():
+			return []
+		entries = []
+		with open(JOURNAL_FILE, "rb") as f:
+			for line in f:
+				try:
+					entries.append(_json_loads(line))
+				except ValueError:
+					continue
+		return entries
+
+	def _journal(self, kind: str, record: dict) -> None:
+		"""Ajoute une entrée `kind` ("patient" ou "consultation") au journal.
+
+		Une mutation coûte ainsi une petite écriture au lieu d'une réécriture
+		complète du fichier ; l'instantané est compacté au-delà du seuil.
+		En mode lot (`batch()`), l'écriture est différée jusqu'à la sortie du lot.
+		"""
+		self._pending.append(_json_dumps({"type": kind, "data": record}) + b"\n")
+		if not self._batch_depth:
+			self._flush_journal()
+
+	def _flush_journal(self) -> None:
+		if not self._pending:
+			return
+		DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+		with open(JOURNAL_FILE, "ab+") as f:
+			# une ligne tronquée par un arrêt brutal est terminée, sinon la
+			# première entrée ajoutée se retrouverait sur la même ligne
+			end = f.seek(0, os.SEEK_END)
+			if end:
+				f.seek(end - 1)
+				if f.read(1) != b"\n":
+					f.write(b"\n")
+			f.writelines(self._pending)
+		self._journal_len += len(self._pending)
+		self._pending = []
+		if self._journal_len >= JOURNAL_COMPACTION_THRESHOLD:
+			self._save()
+
+	@contextmanager
+	def batch(self) -> Iterator[PatientService]:
+		"""Regroupe les mutations du bloc `with` en une seule écriture du journal.
+
+		Les lots peuvent être imbriqués ; l'écriture a lieu à la sortie du lot
+		le plus externe, y compris si une exception interrompt le bloc.
+		"""
+		self._batch_depth += 1
+		try:
+			yield self
+		finally:
+			self._batch_depth -= 1
+			if not self._batch_depth:
+				self._flush_journal()
+
+	def _consultations(self) -> ConsultationService:
+		"""Retourne le `ConsultationService` rattaché, en le créant au besoin."""
+		if self._consultation_service is None:
+			from medical_cabinet.services.consultation_service import ConsultationService
+
+			ConsultationService(patient_service=self)  # se rattache dans son __init__
+		self._consultation_service._ensure_loaded()
+		return self._consultation_service
 
 	def _dump_empty(self) -> None:
 		DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-		with open(DATA_FILE, "w", encoding="utf-8") as f:
-			json.dump({"patients": [], "consultations": []}, f, ensure_ascii=False, indent=2)
-
-	def _save(self, consultations_serialized: Optional[List[dict]] = None) -> None:
-		# Sauvegarde patients + éventuellement consultations passées en param
-		patients_list = [
-			{
-				"numero_secu": p.numero_secu,
-				"nom": p.nom,
-				"prenom": p.prenom,
-				"date_naissance": p.date_naissance.isoformat(),
-				"adresse": p.adresse,
-				"telephone": p.telephone,
-			}
-			for p in self.patients.values()
-		]
-		# charger existant puis mettre à jour
-		obj = {"patients": patients_list}
-		if consultations_serialized is not None:
-			obj["consultations"] = consultations_serialized
-		else:
-			# préserver consultations si existant
-			try:
-				with open(DATA_FILE, "r", encoding="utf-8") as f:
-					existing = json.load(f) or {}
-			except Exception:
-				existing = {}
-			obj["consultations"] = existing.get("consultations", [])
+		self._write_snapshot(_json_dumps({"patients": [], "consultations": []}, indent=True))
+
+	def _write_snapshot(self, payload: bytes) -> None:
+		"""Écrit l'instantané de façon atomique (fichier temporaire puis `os.replace`).
 
-		with open(DATA_FILE, "w", encoding="utf-8") as f:
-			json.dump(obj, f, ensure_ascii=False, indent=2)
+		Ne fait rien si `payload` est identique au dernier instantané connu.
+		"""
+		payload_hash = hash(payload)
+		if payload_hash == self._last_hash:
+			return
+		tmp = DATA_FILE.with_suffix(".json.tmp")
+		with open(tmp, "wb") as f:
+			f.write(payload)
+			# contenu sur disque avant le renommage : sinon une coupure peut
+			# laisser un instantané vide à la place de l'ancien
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, DATA_FILE)
+		_fsync_dir(DATA_FILE.parent)
+		self._last_hash = payload_hash
+
+	def _save(self) -> None:
+		# Compaction : réécrit l'instantané complet puis vide le journal.
+		# `_ensure_loaded` (ici et via `_consultations()`) lève tant que l'état n'a
+		# pas été entièrement chargé : on n'écrase jamais l'instantané avec un état partiel.
+		self._ensure_loaded()
+		obj = {
+			"patients": [self._serialize_patient(p) for p in self._patients.values()],
+			# consultations tenues en mémoire par le service rattaché : pas de relecture du fichier
+			"consultations": [c.to_dict() for c in self._consultations().consultations],
+		}
+
+		self._write_snapshot(_json_dumps(obj, indent=True))
+		# l'instantané (renommage compris, voir `_write_snapshot`) est durable :
+		# le journal peut être vidé (rejouer est idempotent)
+		JOURNAL_FILE.unlink(missing_ok=True)
+		self._journal_len = 0
 
 	@log_action
 	def ajouter_patient(self, patient: Patient) -> None:
@@ -149,36 +362,86 @@ class PatientService:
 
 		Lève `InvalidSecurityNumberError` si le numéro n'a pas 15 chiffres.
 		"""
+		self._ensure_loaded()
 		num = patient.numero_secu
-		if not (isinstance(num, str) and num.isdigit() and len(num) == 15):
-			raise InvalidSecurityNumberError("Le numéro de sécurité sociale doit contenir 15 chiffres")
-		if num in self.patients:
+		validate_security_number(num)
+		if num in self._patients:
 			# on écrase volontairement
-			self.patients[num] = patient
+			self._patients[num] = patient
 		else:
-			self.patients[num] = patient
-		self._save()
+			self._patients[num] = patient
+			self._sorted_secu = None
+		self._dob_arrays = None
+		self._journal("patient", self._serialize_patient(patient))
 
 	def rechercher_patient(self, numero_secu: str) -> Patient:
 		"""Recherche un patient par son numéro de sécurité sociale.
 
 		Lève `PatientNotFoundError` si absent.
 		"""
-		patient = self.patients.get(numero_secu)
+		self._ensure_loaded()
+		patient = self._patients.get(numero_secu)
 		if not patient:
 			raise PatientNotFoundError(f"Patient {numero_secu} introuvable")
 		return patient
 
-	def lister_patients(self) -> List[Patient]:
-		return list(self.patients.values())
+	def lister_patients(self, after: Optional[str] = None, limit: int = 50) -> Tuple[List[Patient], Optional[str]]:
+		"""Retourne une page de patients triés par numéro de sécurité sociale.
 
-	def historique_patient(self, numero_secu: str, consultations: List[dict]) -> List[dict]:
+		`after` est le curseur renvoyé par l'appel précédent (None pour la
+		première page). Retourne `(page, curseur_suivant)`, le curseur valant
+		None lorsqu'il n'y a plus de page.
+		"""
+		keys = self._sorted_keys()
+		start = bisect_right(keys, after) if after is not None else 0
+		page = keys[start:start + limit]
+		cursor = page[-1] if page and start + limit < len(keys) else None
+		return [self._patients[k] for k in page], cursor
+
+	def _sorted_keys(self) -> List[str]:
+		self._ensure_loaded()
+		if self._sorted_secu is None:
+			self._sorted_secu = sorted(self._patients)
+		return self._sorted_secu
+
+	def ages_bulk(self, today: Optional[date] = None) -> np.ndarray | List[int]:
+		"""Retourne l'âge de tous les patients, dans l'ordre de `lister_patients`.
+
+		Avec NumPy, un tableau `int64` calculé en une seule opération vectorisée
+		sur les dates de naissance précalculées ; sans NumPy (extra `perf` non
+		installé), une liste d'entiers. Les deux s'itèrent et s'indexent de la
+		même façon.
+		"""
+		today = today or date.today()
+		keys = self._sorted_keys()
+		if np is None:
+			return [self._patients[k].calculer_age(today) for k in keys]
+		# `date_naissance` est modifiable : les dates font partie de la clé, comme
+		# pour `Patient.calculer_age` (mêmes objets en général, comparés par identité)
+		dobs = [self._patients[k].date_naissance for k in keys]
+		if self._dob_arrays is None or self._dob_arrays[0] != dobs:
+			self._dob_arrays = (
+				dobs,
+				np.fromiter((d.year for d in dobs), dtype=np.int64, count=len(dobs)),
+				np.fromiter((d.month * 100 + d.day for d in dobs), dtype=np.int64, count=len(dobs)),
+			)
+		_, years, month_days = self._dob_arrays
+		return today.year - years - (today.month * 100 + today.day < month_days).astype(np.int64)
+
+	def patients_age_minimum(self, age_min: int, today: Optional[date] = None) -> List[Patient]:
+		"""Retourne les patients âgés d'au moins `age_min` ans (ordre de `lister_patients`)."""
+		ages = self.ages_bulk(today)
+		keys = self._sorted_keys()
+		if np is None:
+			return [self._patients[k] for k, age in zip(keys, ages) if age >= age_min]
+		return [self._patients[keys[i]] for i in np.flatnonzero(ages >= age_min)]
+
+	def historique_patient(self, numero_secu: str) -> List[ConsultationRow]:
 		"""Retourne l'historique des consultations pour un patient.
 
-		`consultations` est la liste sérialisée lue depuis le fichier JSON.
+		Délègue à l'index par patient du `ConsultationService` rattaché.
 		"""
-		if numero_secu not in self.patients:
+		self._ensure_loaded()
+		if numero_secu not in self._patients:
 			raise PatientNotFoundError(f"Patient {numero_secu} introuvable")
-		hist = [c for c in consultations if c.get("patient_num") == numero_secu]
-		return hist
-
+		return self._consultations().historique(numero_secu)
@@ -0,0 +1,28 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Le code importe `medical_cabinet.*` : exposer la racine du dépôt sous ce nom.
+ROOT = Path(__file__).resolve().parent.parent
+if ROOT.name == "medical_cabinet":
+    sys.path.insert(0, str(ROOT.parent))
+else:
+    _alias = Path(tempfile.mkdtemp()) / "medical_cabinet"
+    _alias.symlink_to(ROOT, target_is_directory=True)
+    sys.path.insert(0, str(_alias.parent))
+
+from medical_cabinet.services import consultation_service, patient_service  # noqa: E402
+from medical_cabinet.utils import decorators  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Redirige instantané, journal et logs vers un répertoire temporaire."""
+    data_file = tmp_path / "cabinet_data.json"
+    monkeypatch.setattr(patient_service, "DATA_FILE", data_file)
+    monkeypatch.setattr(patient_service, "JOURNAL_FILE", tmp_path / "cabinet_data.journal")
+    monkeypatch.setattr(consultation_service, "DATA_FILE", data_file)
+    monkeypatch.setattr(decorators, "_LOG_FH", None)
+    return tmp_path
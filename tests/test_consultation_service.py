@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+import pytest
+
+from medical_cabinet.models import Patient
+from medical_cabinet.services import ConsultationService, PatientService, consultation_service
+from medical_cabinet.services.consultation_service import InvalidConsultationStatusError
+
+
+def test_directly_built_row_status_is_interned():
+    # chaîne construite à l'exécution : jamais internée par le compilateur
+    statut = "".join(["réal", "isée"])
+    row = consultation_service.ConsultationRow(
+        id="c1",
+        patient_num="123456789012345",
+        date_heure=datetime(2030, 1, 1, 9, 0),
+        date_heure_iso="2030-01-01T09:00:00",
+        medecin="Dr House",
+        motif="Contrôle",
+        statut=statut,
+    )
+    assert row.statut is consultation_service._STATUS_REALISEE
+
+
+def test_realised_consultation_cannot_be_cancelled(data_dir):
+    ps = PatientService()
+    cs = ConsultationService(patient_service=ps)
+    ps.ajouter_patient(Patient(num_secu="123456789012345", nom="Nom", prenom="Prénom", date_naissance=date(1990, 1, 1)))
+    c = cs.planifier_consultation("123456789012345", datetime(2030, 1, 1, 9, 0), "Dr House", "Contrôle")
+    cs.marquer_realisee(c.id)
+    with pytest.raises(InvalidConsultationStatusError):
+        cs.annuler_consultation(c.id)
+
+
+def test_aware_and_naive_dates_can_be_planned_together(data_dir):
+    ps = PatientService()
+    cs = ConsultationService(patient_service=ps)
+    ps.ajouter_patient(Patient(num_secu="123456789012345", nom="Nom", prenom="Prénom", date_naissance=date(1990, 1, 1)))
+    naive = cs.planifier_consultation("123456789012345", datetime(2030, 1, 1, 9, 0), "Dr House", "Contrôle")
+    aware = cs.planifier_consultation(
+        "123456789012345", datetime.fromisoformat("2030-01-02 10:00+02:00"), "Dr House", "Contrôle"
+    )
+    assert aware.date_heure.tzinfo is None
+    assert aware.date_heure_iso == "2030-01-02T10:00:00+02:00"
+
+    cs = ConsultationService(patient_service=PatientService())
+    page, _ = cs.lister_consultations_a_venir()
+    assert [c.id for c in page] == [naive.id, aware.id]
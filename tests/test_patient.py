@@ -0,0 +1,24 @@
+from datetime import date
+
+from medical_cabinet.models import Patient
+from medical_cabinet.services import PatientService
+
+
+def test_calculer_age_follows_birth_date_change():
+    p = Patient(num_secu="123456789012345", nom="Nom", prenom="Prénom", date_naissance=date(1990, 1, 1))
+    p.calculer_age()
+    p.date_naissance = date(2000, 1, 1)
+    today = date.today()
+    assert p.calculer_age() == p.calculer_age(au_jour=today)
+    assert p.calculer_age() == today.year - 2000 - ((today.month, today.day) < (1, 1))
+
+
+def test_ages_bulk_follows_birth_date_change(data_dir):
+    ps = PatientService()
+    p = Patient(num_secu="123456789012345", nom="Nom", prenom="Prénom", date_naissance=date(1990, 1, 1))
+    ps.ajouter_patient(p)
+    today = date(2030, 6, 1)
+    assert list(ps.ages_bulk(today)) == [40]
+    p.date_naissance = date(2000, 1, 1)
+    assert list(ps.ages_bulk(today)) == [p.calculer_age(today)] == [30]
+    assert ps.patients_age_minimum(35, today) == []
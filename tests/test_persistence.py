@@ -0,0 +1,115 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from medical_cabinet.models import Patient
+from medical_cabinet.services import ConsultationService, PatientService, patient_service
+
+
+def _patient(num: str) -> Patient:
+    return Patient(num_secu=num, nom="Nom", prenom="Prénom", date_naissance=date(1990, 1, 1))
+
+
+def _services():
+    ps = PatientService()
+    return ps, ConsultationService(patient_service=ps)
+
+
+def test_mutations_are_replayed_from_journal(data_dir):
+    ps, cs = _services()
+    ps.ajouter_patient(_patient("111111111111111"))
+    c = cs.planifier_consultation("111111111111111", datetime(2099, 1, 1, 9), "Dr X", "Contrôle")
+    cs.marquer_realisee(c.id)
+    cs.ajouter_diagnostic(c.id, "RAS")
+
+    snapshot = json.loads(patient_service.DATA_FILE.read_text(encoding="utf-8"))
+    assert snapshot == {"patients": [], "consultations": []}
+
+    ps, cs = _services()
+    assert ps.rechercher_patient("111111111111111").nom == "Nom"
+    (row,) = cs.historique("111111111111111")
+    assert (row.id, row.statut, row.diagnostic) == (c.id, "réalisée", "RAS")
+
+
+def test_attributes_load_state_on_first_access(data_dir):
+    ps, cs = _services()
+    ps.ajouter_patient(_patient("111111111111111"))
+    c = cs.planifier_consultation("111111111111111", datetime(2099, 1, 1, 9), "Dr X", "Contrôle")
+
+    ps, cs = _services()
+    assert list(ps.patients) == ["111111111111111"]
+    assert [row.id for row in cs.consultations] == [c.id]
+
+
+
+def test_failed_load_is_retried_and_never_compacted_over(data_dir, monkeypatch):
+    monkeypatch.setattr(patient_service, "JOURNAL_COMPACTION_THRESHOLD", 1)
+    records = [
+        {"numero_secu": "111111111111111", "date_naissance": "1990-01-01"},
+        {"numero_secu": "222222222222222", "date_naissance": "01/01/1990"},
+        {"numero_secu": "333333333333333", "date_naissance": "1990-01-01"},
+    ]
+    patient_service.DATA_FILE.write_text(json.dumps({"patients": records, "consultations": []}), encoding="utf-8")
+    before = patient_service.DATA_FILE.read_bytes()
+
+    ps, _ = _services()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            ps.ajouter_patient(_patient("444444444444444"))
+    assert patient_service.DATA_FILE.read_bytes() == before
+    assert not patient_service.JOURNAL_FILE.exists()
+
+    records[1]["date_naissance"] = "1990-01-01"
+    patient_service.DATA_FILE.write_text(json.dumps({"patients": records, "consultations": []}), encoding="utf-8")
+    assert sorted(ps.patients) == ["111111111111111", "222222222222222", "333333333333333"]
+
+def test_torn_journal_line_does_not_swallow_next_entry(data_dir):
+    ps, _ = _services()
+    ps.ajouter_patient(_patient("111111111111111"))
+    with open(patient_service.JOURNAL_FILE, "ab") as f:
+        f.write(b'{"type": "patient", "data": {"numero_')
+
+    ps, _ = _services()
+    ps.ajouter_patient(_patient("222222222222222"))
+
+    ps, _ = _services()
+    ps.rechercher_patient("111111111111111")
+    ps.rechercher_patient("222222222222222")
+
+
+def test_journal_is_compacted_at_threshold(data_dir, monkeypatch):
+    monkeypatch.setattr(patient_service, "JOURNAL_COMPACTION_THRESHOLD", 3)
+    ps, cs = _services()
+    ps.ajouter_patient(_patient("111111111111111"))
+    c = cs.planifier_consultation("111111111111111", datetime(2099, 1, 1, 9), "Dr X", "Contrôle")
+    assert patient_service.JOURNAL_FILE.exists()
+    cs.annuler_consultation(c.id)
+
+    assert not patient_service.JOURNAL_FILE.exists()
+    snapshot = json.loads(patient_service.DATA_FILE.read_text(encoding="utf-8"))
+    assert [p["numero_secu"] for p in snapshot["patients"]] == ["111111111111111"]
+    assert [(x["id"], x["statut"]) for x in snapshot["consultations"]] == [(c.id, "annulée")]
+
+    ps, cs = _services()
+    assert cs.historique("111111111111111")[0].statut == "annulée"
+
+
+def test_batch_writes_journal_once(data_dir):
+    ps, _ = _services()
+    with ps.batch():
+        ps.ajouter_patient(_patient("111111111111111"))
+        ps.ajouter_patient(_patient("222222222222222"))
+        assert not patient_service.JOURNAL_FILE.exists()
+    assert len(patient_service.JOURNAL_FILE.read_bytes().splitlines()) == 2
+
+
+def test_consultation_batch_yields_consultation_service(data_dir):
+    ps, cs = _services()
+    ps.ajouter_patient(_patient("111111111111111"))
+    with cs.batch() as b:
+        assert b is cs
+        b.planifier_consultation("111111111111111", datetime(2099, 1, 1, 9), "Dr X", "Contrôle")
+        b.planifier_consultation("111111111111111", datetime(2099, 1, 2, 9), "Dr X", "Contrôle")
+        assert len(patient_service.JOURNAL_FILE.read_bytes().splitlines()) == 1
+    assert len(patient_service.JOURNAL_FILE.read_bytes().splitlines()) == 3
@@ -1,5 +1,10 @@
 from functools import wraps
 from datetime import datetime
+from pathlib import Path
+import atexit
+import queue
+import threading
+import time
 
 
 # Exceptions personnalisées
@@ -15,13 +20,59 @@ class ConsultationNotFoundError(Exception):
 
 # Décorateurs
 
-LOG_FILE = "logs.txt"
+# ancré à la racine du projet, indépendamment du répertoire courant
+LOG_FILE = Path(__file__).resolve().parent.parent / "logs.txt"
+
+# Nombre maximal d'entrées écrites en une fois par le thread de log
+LOG_BATCH_SIZE = 100
+
+# Les actions déposent (horodatage, description) dans une file ; un thread
+# d'arrière-plan écrit dans le fichier, ouvert une seule fois pour tout le processus.
+_log_q = queue.SimpleQueue()
+
+
+def _log_worker():
+    running = True
+    while running:
+        records = [_log_q.get()]
+        while len(records) < LOG_BATCH_SIZE:
+            try:
+                records.append(_log_q.get_nowait())
+            except queue.Empty:
+                break
+        if None in records:
+            # signal d'arrêt : écrire ce qui précède puis terminer
+            records = records[: records.index(None)]
+            running = False
+        _LOG_FH.writelines(
+            f"[{datetime.fromtimestamp(ts).strftime('%d/%m/%Y %H:%M:%S')}] Action effectuée : {description}\n"
+            for ts, description in records
+        )
+        _LOG_FH.flush()
+
+
+def _drain_log():
+    _log_q.put(None)
+    _log_thread.join()
+    _LOG_FH.close()
+
+
+try:
+    _LOG_FH = open(LOG_FILE, "a", encoding="utf-8")
+except OSError:
+    _LOG_FH = None
+else:
+    _log_thread = threading.Thread(target=_log_worker, name="log_action", daemon=True)
+    _log_thread.start()
+    atexit.register(_drain_log)
 
 
 def log_action(description: str):
     """
     Enregistre une action dans le fichier logs.txt
     Format : [Date/Heure] Action effectuée : description
+
+    L'écriture est faite par un thread d'arrière-plan : l'appel ne l'attend pas.
     """
 
     def decorator(func):
@@ -29,9 +80,8 @@ def log_action(description: str):
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
 
-            with open(LOG_FILE, "a", encoding="utf-8") as file:
-                timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                file.write(f"[{timestamp}] Action effectuée : {description}\n")
+            if _LOG_FH is not None:
+                _log_q.put_nowait((time.time(), description))
 
             return result
 
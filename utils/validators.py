@@ -1,6 +1,5 @@
-import re
-from datetime import date
 from __future__ import annotations
+from datetime import date
 # Exceptions personnalisées
 
 class InvalidSecurityNumberError(Exception):
@@ -18,7 +17,7 @@ def validate_security_number(security_number: str) -> None:
     """
     Vérifie que le numéro de sécurité sociale contient exactement 15 chiffres
     """
-    if not re.fullmatch(r"\d{15}", security_number):
+    if not isinstance(security_number, str) or len(security_number) != 15 or not security_number.isdigit():
         raise InvalidSecurityNumberError(
             "Le numéro de sécurité sociale doit contenir exactement 15 chiffres."
         )